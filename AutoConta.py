@@ -1,17 +1,20 @@
 import os
+import multiprocessing
 import re
 import tkinter as tk
 from pathlib import Path
 from tkinter import ttk, filedialog, messagebox, simpledialog
-from generare_procuri import DocumentProcessor
+from generare_procuri import (AUTOTUNE_CACHE_PATH, DocumentProcessor, ResourceGovernor, load_template_set,
+                              template_outputs)
 
 class AutoContaApp(tk.Tk):
     def __init__(self):
         super().__init__()
         self.title("AutoConta")
-        self.geometry("600x250")
+        self.geometry("600x300")
 
-        self.processor = DocumentProcessor()
+        # Calibrarea auto-tune e păstrată între sesiuni, ca să nu se repete la fiecare pornire
+        self.processor = DocumentProcessor(governor=ResourceGovernor(mode='auto', cache_path=AUTOTUNE_CACHE_PATH))
         self.create_widgets()
 
     def create_widgets(self):
@@ -28,6 +31,12 @@ class AutoContaApp(tk.Tk):
         self.input_path_entry.grid(row=0, column=1, padx=10, pady=10)
         tk.Button(tab_procura, text="Alege folder", command=self.browse_input_folder).grid(row=0, column=2, padx=5, pady=10)
 
+        # Set de template-uri (opțional, JSON); implicit doar procura RO/ENG
+        tk.Label(tab_procura, text="Set template-uri:").grid(row=1, column=0, padx=10, pady=10, sticky="nsew")
+        self.template_set_entry = tk.Entry(tab_procura, width=50)
+        self.template_set_entry.grid(row=1, column=1, padx=10, pady=10)
+        tk.Button(tab_procura, text="Alege set", command=self.browse_template_set).grid(row=1, column=2, padx=5, pady=10)
+
         # Output path (folder)
         tk.Label(tab_procura, text="Folder ieșire:").grid(row=2, column=0, padx=10, pady=10, sticky="nsew")
         self.output_path_entry = tk.Entry(tab_procura, width=50)
@@ -38,6 +47,9 @@ class AutoContaApp(tk.Tk):
         generate_button = tk.Button(tab_procura, text="Generează Procură", command=self.generate_procura_gui, bg="#4CAF50", fg="white", font=("Arial", 12, "bold"))
         generate_button.grid(row=3, column=1, pady=20)
 
+        # Recalibrare auto-tune, de ex. după schimbarea calculatorului sau a tipului de dosare
+        tk.Button(tab_procura, text="Recalibrează", command=self.reset_tuning_gui).grid(row=3, column=2, padx=5, pady=20)
+
     def browse_input_folder(self):
         folder_selected = filedialog.askdirectory()
         if folder_selected:
@@ -50,12 +62,22 @@ class AutoContaApp(tk.Tk):
             self.template_path_entry.delete(0, tk.END)
             self.template_path_entry.insert(0, file_selected)
 
+    def browse_template_set(self):
+        file_selected = filedialog.askopenfilename(filetypes=[("Set template-uri", "*.json")])
+        if file_selected:
+            self.template_set_entry.delete(0, tk.END)
+            self.template_set_entry.insert(0, file_selected)
+
     def browse_output_folder(self):
         folder_selected = filedialog.askdirectory()
         if folder_selected:
             self.output_path_entry.delete(0, tk.END)
             self.output_path_entry.insert(0, folder_selected)
 
+    def reset_tuning_gui(self):
+        self.processor.governor.reset_tuning()
+        messagebox.showinfo("Recalibrare", "Numărul de procese va fi recalibrat la următorul dosar suficient de mare.")
+
     def prompt_missing_fields_gui(self, context: dict, required_fields: list) -> dict:
         """
         Deschide o fereastră de input pentru câmpurile lipsă și returnează dict-ul completat.
@@ -104,46 +126,57 @@ class AutoContaApp(tk.Tk):
 
     def generate_procura_gui(self):
         input_dir = self.input_path_entry.get()
-        template_path = "IMPUTERNICIRE_model_ro_eng.docx"
+        template_set_path = self.template_set_entry.get().strip()
         output_folder = self.output_path_entry.get()
 
-        if not input_dir or not template_path or not output_folder:
+        if not input_dir or not output_folder:
             messagebox.showwarning("Atenție", "Completează toate câmpurile!")
             return
 
-        # Creează calea fișierului de ieșire (nume automat)
-        output_path = os.path.join(output_folder, f"PROCURA_GENERATA_{os.path.split(input_dir)[1]}.docx")
         os.makedirs(output_folder, exist_ok=True)
 
         try:
-            # Procesează fișierele și extrage datele
-            all_data = {}
-            for file_path in Path(input_dir).iterdir():
-                if file_path.is_file() and file_path.suffix.lower() in self.processor.supported_extensions:
-                    text = self.processor.read_file(str(file_path))
-                    extracted = self.processor.extract_data(text)
-                    for k, v in extracted.items():
-                        all_data.setdefault(k, []).append(v)
-
-            if not all_data:
+            # Creează căile fișierelor de ieșire (nume automat) pentru fiecare template
+            template_set = load_template_set(template_set_path or None)
+            outputs = template_outputs(template_set, output_folder, os.path.split(input_dir)[1])
+            # Citește template-urile înainte de extragere: un template lipsă sau invalid
+            # oprește aici, nu după citirea și OCR-ul tuturor fișierelor
+            required_fields = self.processor.required_fields(outputs.values())
+
+            # Procesează fișierele, extrage datele și îmbină valorile din toate documentele
+            result = self.processor.merge_directory(input_dir)
+
+            if not result.context:
                 messagebox.showwarning("Atenție", "Nu s-au găsit date în niciun fișier.")
                 return
 
-            # Folosește prima valoare găsită pentru fiecare câmp
-            context = {k: v[0] for k, v in all_data.items()}
+            # Semnalează câmpurile în conflict sau nesigure, ca să fie verificate
+            flagged = [f"{f}: ales '{result.context[f]}', alternative: {', '.join(alt)}"
+                       for f, alt in result.conflicts.items()]
+            flagged += [f"{f}: '{result.context[f]}' (încredere scăzută)"
+                        for f in result.low_confidence_fields() if f not in result.conflicts]
+            if flagged:
+                messagebox.showwarning("Verifică datele", "\n".join(flagged))
+
+            context = dict(result.context)
 
-            # Completează câmpurile lipsă folosind metoda GUI
-            required_fields = list(self.processor.patterns.keys())
+            # Completează câmpurile lipsă, doar cele cerute de template-uri
             context = self.prompt_missing_fields_gui(context, required_fields)
 
-            # Generează procura
-            self.processor.generate_procura(template_path, output_path, context)
-            messagebox.showinfo("Succes", f"Procura a fost generată la:\n{output_path}")
+            # Generează toate documentele din set dintr-o singură extragere
+            generated = self.processor.generate_documents(outputs, context)
+            failed = [p for p in outputs if p not in generated]
+            if failed:
+                messagebox.showerror("Eroare", "Nu s-au putut genera:\n" + "\n".join(failed))
+            if generated:
+                messagebox.showinfo("Succes", "Documente generate:\n" + "\n".join(generated))
 
         except Exception as e:
             messagebox.showerror("Eroare", f"A apărut o eroare:\n{e}")
 
 
 if __name__ == "__main__":
+    # Necesar pentru procesele worker în executabilul PyInstaller
+    multiprocessing.freeze_support()
     app = AutoContaApp()
     app.mainloop()
@@ -36,6 +36,7 @@ added_files.extend(tesseract_data)
 # Hidden imports pentru bibliotecile care nu sunt detectate automat
 hidden_imports = [
     'pdfplumber',
+    'pypdfium2',
     'docxtpl',
     'docx',
     'pytesseract', 
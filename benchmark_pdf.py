@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Benchmark pentru backend-urile PDF (PDFium vs pdfplumber).
+
+Generează un corpus sintetic de PDF-uri native (extrase ONRC / acte
+constitutive fictive), jumătate cu diacritice românești, și compară
+paginile pe secundă, echivalența textului extras și a câmpurilor obținute
+cu extract_data pentru fiecare backend al DocumentProcessor. Măsoară și
+read_document, care extrage și tabelele (unele documente au un tabel
+desenat cu datele firmei). Câteva documente sunt salvate și ca PDF-uri
+scanate (doar imagine), pentru ramura de randare + OCR.
+"""
+
+import argparse
+import difflib
+import random
+import re
+import sys
+import time
+import zlib
+from pathlib import Path
+
+from generare_procuri import DocumentProcessor, PDF_BACKENDS
+
+
+NUME = ["POPESCU ION", "IONESCU MARIA", "GEORGESCU ANDREI", "DUMITRU ELENA", "STAN MIHAI"]
+LOCALITATI = ["Mun. Bucuresti", "Mun. Cluj-Napoca", "Mun. Iasi", "Mun. Timisoara", "Mun. Brasov"]
+
+# Literele românești care nu există în WinAnsiEncoding, mapate pe coduri
+# redefinite prin /Differences în fontul PDF (â și î există deja în WinAnsi)
+DIACRITICE_PDF = {
+    "ă": ("\x80", "abreve"), "Ă": ("\x81", "Abreve"),
+    "ș": ("\x82", "scommaaccent"), "Ș": ("\x83", "Scommaaccent"),
+    "ț": ("\x84", "tcommaaccent"), "Ț": ("\x85", "Tcommaaccent"),
+}
+
+
+def _linii_document(rng: random.Random, index: int) -> list:
+    """Generează liniile unui document sintetic, cu date ca în extrasele reale."""
+    nume = rng.choice(NUME)
+    localitate = rng.choice(LOCALITATI)
+    cnp = "".join(str(rng.randint(0, 9)) for _ in range(13))
+    cui = str(rng.randint(10000000, 49999999))
+    if index % 2 == 0:
+        return _linii_document_diacritice(rng, index, nume, localitate, cnp, cui)
+    linii = [
+        f"EXTRAS DE REGISTRU NR. {index}",
+        f"Denumirea societatii este: SINTETIC {index} S.R.L.",
+        f"Cod Unic de Inregistrare: RO{cui}",
+        f"Nr. de ordine in registrul comertului: J40/{rng.randint(100, 9999)}/2020",
+        f"Identificator unic la nivel european (EUID): ROONRC.J40/{rng.randint(100, 9999)}/2020",
+        f"Sediu social: {localitate}, Str. Exemplu nr. {rng.randint(1, 200)}",
+        f"Asociat unic: {nume.title()}, cetatean roman, nascut la data de "
+        f"{rng.randint(1, 28):02d}.{rng.randint(1, 12):02d}.{rng.randint(1950, 2000)}, "
+        f"domiciliat in {localitate}, identificat cu CI seria RX nr. {rng.randint(100000, 999999)}, "
+        f"CNP {cnp}",
+    ]
+    # Text de umplutură, ca articolele unui act constitutiv lung
+    for art in range(1, 60):
+        linii.append(f"Art. {art}. Societatea isi desfasoara activitatea conform legii nr. 31/1990, "
+                     f"republicata, cu modificarile ulterioare, punctul {rng.randint(1, 99)}.")
+    return linii
+
+
+def _linii_document_diacritice(rng: random.Random, index: int, nume: str, localitate: str,
+                               cnp: str, cui: str) -> list:
+    """Ca _linii_document, dar cu formulările reale, cu diacritice."""
+    localitate = localitate.replace("Bucuresti", "București").replace("Iasi", "Iași") \
+                           .replace("Timisoara", "Timișoara").replace("Brasov", "Brașov")
+    linii = [
+        f"EXTRAS DE REGISTRU NR. {index}",
+        f"Denumirea societății este: SINTETIC {index} S.R.L.",
+        f"Cod Unic de Înregistrare: RO{cui}",
+        f"Nr. de ordine în registrul comerțului: J40/{rng.randint(100, 9999)}/2020",
+        f"Identificator unic la nivel european (EUID): ROONRC.J40/{rng.randint(100, 9999)}/2020",
+        f"Sediul societății este în {localitate}, Str. Ștefan cel Mare nr. {rng.randint(1, 200)}.",
+        f"Asociat unic: {nume.title()}, cetățean român, născut la data de "
+        f"{rng.randint(1, 28):02d}.{rng.randint(1, 12):02d}.{rng.randint(1950, 2000)}, "
+        f"domiciliat în {localitate}, identificat cu CI seria RX nr. {rng.randint(100000, 999999)}, "
+        f"CNP {cnp}",
+    ]
+    for art in range(1, 60):
+        linii.append(f"Art. {art}. Societatea își desfășoară activitatea conform legii nr. 31/1990, "
+                     f"republicată, cu modificările ulterioare, punctul {rng.randint(1, 99)}.")
+    return linii
+
+
+def _escape_pdf(text: str) -> str:
+    text = text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+    for litera, (cod, _) in DIACRITICE_PDF.items():
+        text = text.replace(litera, cod)
+    return text
+
+
+def _tabel_document(linii: list) -> list:
+    """Tabelul etichetă-valoare al unui document, cu valorile din primele linii."""
+    etichete = ["Denumire", "Cod unic de înregistrare", "Nr. de ordine în registrul comerțului", "EUID"]
+    return [(eticheta, linie.split(": ", 1)[1]) for eticheta, linie in zip(etichete, linii[1:5])]
+
+
+def _pagina_tabel(tabel: list) -> list:
+    """Comenzile unei pagini cu un tabel de două coloane, cu linii desenate."""
+    x0, x1, x2, sus, inaltime = 40, 240, 555, 780, 20
+    jos = sus - inaltime * len(tabel)
+    continut = ["0.5 w"]
+    for r in range(len(tabel) + 1):
+        y = sus - r * inaltime
+        continut.append(f"{x0} {y} m {x2} {y} l S")
+    for x in (x0, x1, x2):
+        continut.append(f"{x} {sus} m {x} {jos} l S")
+    for r, (eticheta, valoare) in enumerate(tabel):
+        y = sus - (r + 1) * inaltime + 6
+        continut.append(f"BT /F1 9 Tf {x0 + 5} {y} Td ({_escape_pdf(eticheta)}) Tj ET")
+        continut.append(f"BT /F1 9 Tf {x1 + 5} {y} Td ({_escape_pdf(valoare)}) Tj ET")
+    return continut
+
+
+def scrie_pdf(path: Path, linii: list, linii_pe_pagina: int = 45, tabel: list = None):
+    """
+    Scrie un PDF nativ minimal (Helvetica), fără dependințe externe. Dacă e dat,
+    tabelul (perechi etichetă-valoare) e desenat pe o pagină separată, la final.
+    """
+    pagini = []
+    for i in range(0, len(linii), linii_pe_pagina):
+        continut = ["BT", "/F1 9 Tf", "11 TL", "40 800 Td"]
+        for linie in linii[i:i + linii_pe_pagina]:
+            continut.append(f"({_escape_pdf(linie)}) Tj T*")
+        continut.append("ET")
+        pagini.append(continut)
+    if tabel:
+        pagini.append(_pagina_tabel(tabel))
+    obiecte = []
+
+    n_pagini = len(pagini)
+    # 1: catalog, 2: pages, 3: font, apoi perechi (page, content)
+    kids = " ".join(f"{4 + 2 * i} 0 R" for i in range(n_pagini))
+    obiecte.append("<< /Type /Catalog /Pages 2 0 R >>")
+    obiecte.append(f"<< /Type /Pages /Kids [{kids}] /Count {n_pagini} >>")
+    differences = " ".join(f"{ord(cod)} /{glifa}" for cod, glifa in DIACRITICE_PDF.values())
+    obiecte.append(f"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding "
+                   f"<< /Type /Encoding /BaseEncoding /WinAnsiEncoding /Differences [{differences}] >> >>")
+    for i, continut in enumerate(pagini):
+        stream = "\n".join(continut)
+        obiecte.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>")
+        obiecte.append(f"<< /Length {len(stream.encode('latin-1'))} >>\nstream\n{stream}\nendstream")
+
+    path.write_bytes(_serializeaza_pdf([o.encode("latin-1") for o in obiecte]))
+    return n_pagini
+
+
+def scrie_pdf_scanat(path: Path, sursa: Path, dpi: int = 150) -> int:
+    """
+    Scrie o copie "scanată" a unui PDF nativ: fiecare pagină devine o imagine
+    grayscale, fără strat de text, deci citirea trece prin randare + OCR.
+    """
+    import pypdfium2 as pdfium
+    pdf = pdfium.PdfDocument(str(sursa))
+    imagini = []
+    try:
+        for page in pdf:
+            bitmap = page.render(scale=dpi / 72, grayscale=True)
+            try:
+                # Bitmap-ul are rândurile aliniate la stride; păstrăm doar pixelii
+                buffer = bytes(bitmap.buffer)
+                pixeli = b"".join(buffer[r * bitmap.stride:r * bitmap.stride + bitmap.width]
+                                  for r in range(bitmap.height))
+                imagini.append((bitmap.width, bitmap.height, zlib.compress(pixeli)))
+            finally:
+                bitmap.close()
+                page.close()
+    finally:
+        pdf.close()
+
+    n_pagini = len(imagini)
+    # 1: catalog, 2: pages, apoi triplete (page, content, imagine)
+    kids = " ".join(f"{3 + 3 * i} 0 R" for i in range(n_pagini))
+    obiecte = [b"<< /Type /Catalog /Pages 2 0 R >>",
+               f"<< /Type /Pages /Kids [{kids}] /Count {n_pagini} >>".encode("latin-1")]
+    for i, (latime, inaltime, date) in enumerate(imagini):
+        stream = b"q 595 0 0 842 0 0 cm /Im0 Do Q"
+        obiecte.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       f"/Resources << /XObject << /Im0 {5 + 3 * i} 0 R >> >> "
+                       f"/Contents {4 + 3 * i} 0 R >>".encode("latin-1"))
+        obiecte.append(f"<< /Length {len(stream)} >>\nstream\n".encode("latin-1") + stream + b"\nendstream")
+        obiecte.append(f"<< /Type /XObject /Subtype /Image /Width {latime} /Height {inaltime} "
+                       f"/ColorSpace /DeviceGray /BitsPerComponent 8 /Filter /FlateDecode "
+                       f"/Length {len(date)} >>\nstream\n".encode("latin-1") + date + b"\nendstream")
+
+    path.write_bytes(_serializeaza_pdf(obiecte))
+    return n_pagini
+
+
+def _serializeaza_pdf(obiecte: list) -> bytes:
+    """Asamblează obiectele (bytes, numerotate de la 1) într-un fișier PDF cu xref."""
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for nr, obiect in enumerate(obiecte, start=1):
+        offsets.append(len(out))
+        out += f"{nr} 0 obj\n".encode("latin-1") + obiect + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(obiecte) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    for off in offsets:
+        out += f"{off:010d} 00000 n \n".encode("latin-1")
+    out += f"trailer\n<< /Size {len(obiecte) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    return bytes(out)
+
+
+def genereaza_corpus(output_dir: Path, n_documente: int, n_scanate: int = 2, seed: int = 27) -> int:
+    """
+    Generează corpusul sintetic și întoarce numărul total de pagini native.
+    Fiecare al patrulea document are și un tabel desenat; primele n_scanate
+    documente sunt copiate și ca PDF-uri scanate în scanate/.
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    total_pagini = 0
+    for i in range(1, n_documente + 1):
+        linii = _linii_document(rng, i)
+        tabel = _tabel_document(linii) if i % 4 == 0 else None
+        total_pagini += scrie_pdf(output_dir / f"sintetic_{i:03d}.pdf", linii, tabel=tabel)
+
+    scanate_dir = output_dir / "scanate"
+    scanate_dir.mkdir(exist_ok=True)
+    for i in range(1, min(n_scanate, n_documente) + 1):
+        scrie_pdf_scanat(scanate_dir / f"scanat_{i:03d}.pdf", output_dir / f"sintetic_{i:03d}.pdf")
+    return total_pagini
+
+
+def _normalizeaza(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _numara_pagini(fisiere: list) -> int:
+    import pypdfium2 as pdfium
+    total = 0
+    for f in fisiere:
+        pdf = pdfium.PdfDocument(str(f))
+        total += len(pdf)
+        pdf.close()
+    return total
+
+
+def ruleaza_benchmark_scanate(scanate_dir: Path):
+    """
+    Măsoară pagini/secundă pe PDF-urile scanate: randare în proces (PDFium)
+    față de pdf2image/poppler (pdfplumber), plus OCR în ambele cazuri. O
+    singură rulare per backend, fiindcă OCR-ul domină timpul.
+    """
+    fisiere = sorted(scanate_dir.glob("*.pdf"))
+    if not fisiere:
+        print(f"Nu există PDF-uri scanate în {scanate_dir}, sar peste randare + OCR")
+        return
+    total_pagini = _numara_pagini(fisiere)
+
+    date = {}
+    for backend in PDF_BACKENDS:
+        processor = DocumentProcessor(pdf_backend=backend)
+        start = time.perf_counter()
+        texte = {f.name: processor.read_pdf(str(f)) for f in fisiere}
+        durata = time.perf_counter() - start
+        date[backend] = {nume: processor.extract_data(text) for nume, text in texte.items()}
+        print(f"{backend:<12} scanate: {total_pagini} pagini (randare + OCR) în {durata:.3f}s "
+              f"-> {total_pagini / durata:.2f} pagini/s")
+
+    identice = sum(date['pdfplumber'][nume] == date['pdfium'][nume] for nume in date['pdfium'])
+    print(f"Câmpuri extract_data identice pe scanate: {identice}/{len(fisiere)} documente")
+
+
+def ruleaza_benchmark(corpus_dir: Path, repetari: int = 3):
+    """
+    Măsoară pagini/secundă pentru fiecare backend și compară textul și câmpurile
+    extrase (extract_data), fiindcă pattern-urile depind și de poziția liniilor noi.
+    """
+    fisiere = sorted(corpus_dir.glob("*.pdf"))
+    if not fisiere:
+        print(f"Nu există PDF-uri în {corpus_dir}")
+        return False
+
+    total_pagini = _numara_pagini(fisiere)
+
+    texte = {}
+    processor = None
+    for backend in PDF_BACKENDS:
+        processor = DocumentProcessor(pdf_backend=backend)
+        durate = []
+        for _ in range(repetari):
+            start = time.perf_counter()
+            rezultat = {f.name: processor.read_pdf(str(f)) for f in fisiere}
+            durate.append(time.perf_counter() - start)
+        texte[backend] = rezultat
+        best = min(durate)
+        print(f"{backend:<12} {total_pagini} pagini în {best:.3f}s -> {total_pagini / best:.1f} pagini/s")
+
+    referinta, candidat = 'pdfplumber', 'pdfium'
+    identice = 0
+    ratii = []
+    for nume in texte[referinta]:
+        a = _normalizeaza(texte[referinta][nume])
+        b = _normalizeaza(texte[candidat][nume])
+        identice += a == b
+        ratii.append(difflib.SequenceMatcher(None, a, b).ratio())
+    print(f"Text identic (după normalizarea spațiilor): {identice}/{len(ratii)} documente, "
+          f"similaritate minimă {min(ratii):.4f}")
+
+    campuri_identice = 0
+    for nume in sorted(texte[referinta]):
+        date_referinta = processor.extract_data(texte[referinta][nume])
+        date_candidat = processor.extract_data(texte[candidat][nume])
+        if date_referinta == date_candidat:
+            campuri_identice += 1
+            continue
+        for camp in sorted(set(date_referinta) | set(date_candidat)):
+            if date_referinta.get(camp) != date_candidat.get(camp):
+                print(f"  {nume} / {camp}: {referinta}={date_referinta.get(camp)!r} "
+                      f"{candidat}={date_candidat.get(camp)!r}")
+    print(f"Câmpuri extract_data identice: {campuri_identice}/{len(texte[referinta])} documente")
+
+    # read_document adaugă extragerea tabelelor, doar pe paginile cu semnal de tabel
+    for backend in PDF_BACKENDS:
+        processor = DocumentProcessor(pdf_backend=backend)
+        durate = []
+        for _ in range(repetari):
+            start = time.perf_counter()
+            continut = [processor.read_document(str(f)) for f in fisiere]
+            durate.append(time.perf_counter() - start)
+        best = min(durate)
+        cu_tabele = sum(1 for c in continut if c.table_fields)
+        print(f"{backend:<12} read_document: {total_pagini} pagini în {best:.3f}s -> "
+              f"{total_pagini / best:.1f} pagini/s, {cu_tabele} documente cu câmpuri din tabele")
+
+    ruleaza_benchmark_scanate(corpus_dir / "scanate")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark backend-uri PDF AutoConta")
+    parser.add_argument("--corpus", default="corpus_sintetic", help="Folderul corpusului sintetic")
+    parser.add_argument("--documente", type=int, default=20, help="Numărul de documente generate")
+    parser.add_argument("--scanate", type=int, default=2, help="Câte documente sunt copiate ca PDF-uri scanate")
+    parser.add_argument("--repetari", type=int, default=3, help="Numărul de rulări per backend")
+    parser.add_argument("--fara-generare", action="store_true", help="Folosește corpusul existent")
+    args = parser.parse_args()
+
+    corpus_dir = Path(args.corpus)
+    if not args.fara_generare:
+        pagini = genereaza_corpus(corpus_dir, args.documente, args.scanate)
+        print(f"✓ Corpus sintetic generat: {args.documente} documente, {pagini} pagini în {corpus_dir} "
+              f"(+{min(args.scanate, args.documente)} scanate)")
+
+    return 0 if ruleaza_benchmark(corpus_dir, args.repetari) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
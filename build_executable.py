@@ -15,6 +15,7 @@ def check_dependencies():
     required_packages = [
         'pyinstaller',
         'pdfplumber',
+        'pypdfium2',
         'python-docx',
         'docxtpl',
         'pytesseract',
@@ -88,6 +89,7 @@ added_files.extend(tesseract_data)
 # Hidden imports pentru bibliotecile care nu sunt detectate automat
 hidden_imports = [
     'pdfplumber',
+    'pypdfium2',
     'docxtpl',
     'docx',
     'pytesseract', 
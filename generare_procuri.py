@@ -1,12 +1,20 @@
 import os
 import re
+import json
+import string
 import logging
+import multiprocessing
 import tempfile
+import time
+import unicodedata
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional, Union
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
 
 # Importuri pentru diferite tipuri de fișiere
 import pdfplumber
+import pypdfium2 as pdfium
 from docxtpl import DocxTemplate
 from docx import Document
 import pytesseract
@@ -20,10 +28,366 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 logger = logging.getLogger(__name__)
 
 
+# Backend-uri disponibile pentru citirea PDF-urilor
+PDF_BACKENDS = ('pdfium', 'pdfplumber')
+
+# Rezoluția folosită la randarea paginilor PDF pentru OCR (ca la pdf2image)
+PDF_RENDER_DPI = 200
+
+# Configurația Tesseract implicită (română + engleză)
+OCR_CONFIG = r"--oem 3 --psm 6 -l ron+eng"
+
+# ş/ţ cu sedilă -> ș/ț cu virgulă. PDFium (și documentele mai vechi) întorc forma
+# cu sedilă, iar pattern-urile și etichetele folosesc doar forma corectă, cu virgulă
+CEDILLA_TO_COMMA = str.maketrans("şţŞŢ", "șțȘȚ")
+
+# Semnalul că o pagină PDF nativă are tabele: cel puțin atâtea linii/dreptunghiuri
+# desenate și o linie de text care începe cu o etichetă urmată de o valoare scurtă
+TABLE_MIN_RULINGS = 3
+TABLE_VALUE_MAX_LENGTH = 80
+
+# Ponderea fiecărui tip de sursă la îmbinarea valorilor din mai multe documente
+SOURCE_WEIGHTS = {
+    'docx_tabel': 1.0,
+    'pdf_tabel': 1.0,
+    'docx': 0.9,
+    'pdf': 0.9,
+    'pdf_ocr': 0.7,
+    'imagine_ocr': 0.7,
+}
+
+# Sub acest prag de încredere OCR un candidat e refăcut prin OCR pe regiunea lui,
+# iar un câmp e raportat ca nesigur
+LOW_CONFIDENCE_THRESHOLD = 0.6
+
+# Factorul de mărire și marginea (în pixeli) pentru re-OCR-ul unei regiuni
+REOCR_SCALE = 2
+REOCR_PADDING = 12
+# Câte cuvinte de după potrivire intră în regiune, pentru lookahead-urile pattern-urilor
+REOCR_CONTEXT_WORDS = 3
+
+
+# Setul implicit de template-uri: un singur document, procura RO/ENG.
+# "iesire" este numele fișierului generat; {client} = numele folderului de intrare.
+DEFAULT_TEMPLATE_SET = [
+    {'template': 'IMPUTERNICIRE_model_ro_eng.docx', 'iesire': 'PROCURA_GENERATA_{client}.docx'},
+]
+
+
+def load_template_set(config_path: Optional[str] = None) -> List[Dict[str, str]]:
+    """
+    Încarcă un set de template-uri dintr-un JSON de forma
+    [{"template": "model.docx", "iesire": "NUME_{client}.docx"}, ...].
+    Căile relative ale template-urilor sunt relative la fișierul de configurare.
+    Fără config_path se întoarce DEFAULT_TEMPLATE_SET.
+    """
+    if not config_path:
+        return [dict(entry) for entry in DEFAULT_TEMPLATE_SET]
+
+    with open(config_path, encoding='utf-8') as f:
+        entries = json.load(f)
+    if not isinstance(entries, list) or not entries:
+        raise ValueError(f"Setul de template-uri din {config_path} trebuie să fie o listă nevidă")
+
+    base_dir = Path(config_path).parent
+    template_set = []
+    seen_outputs = {}
+    for entry in entries:
+        if not isinstance(entry, dict) or not entry.get('template') or not entry.get('iesire'):
+            raise ValueError(f"Intrare invalidă în {config_path}: {entry} (necesită 'template' și 'iesire')")
+        _check_output_name(entry['iesire'], config_path)
+
+        # Comparația ignoră majusculele, ca pe Windows
+        output_key = entry['iesire'].lower()
+        if output_key in seen_outputs:
+            raise ValueError(f"Ieșire duplicată în {config_path}: '{entry['iesire']}' apare și pentru "
+                             f"'{seen_outputs[output_key]}' și pentru '{entry['template']}'")
+        seen_outputs[output_key] = entry['template']
+
+        template = Path(entry['template'])
+        if not template.is_absolute():
+            template = base_dir / template
+        template_set.append({'template': str(template), 'iesire': entry['iesire']})
+    return template_set
+
+
+def _check_output_name(output_name: str, config_path: str):
+    """Verifică că numele de ieșire folosește doar placeholder-ul {client}."""
+    try:
+        placeholders = {field for _, field, _, _ in string.Formatter().parse(output_name) if field is not None}
+    except ValueError as e:
+        raise ValueError(f"Nume de ieșire invalid în {config_path}: '{output_name}' ({e})") from None
+    unknown = placeholders - {'client'}
+    if unknown:
+        raise ValueError(f"Nume de ieșire invalid în {config_path}: '{output_name}' folosește "
+                         f"{', '.join('{' + f + '}' for f in sorted(unknown))}; singurul permis este {{client}}")
+
+
+def template_outputs(template_set: List[Dict[str, str]], output_dir: str, client: str) -> Dict[str, str]:
+    """Întoarce {cale_iesire: cale_template} pentru un client."""
+    outputs = {}
+    for entry in template_set:
+        output_path = os.path.join(output_dir, entry['iesire'].format(client=client))
+        if output_path in outputs:
+            raise ValueError(f"Template-urile '{outputs[output_path]}' și '{entry['template']}' "
+                             f"ar scrie același fișier: {output_path}")
+        outputs[output_path] = entry['template']
+    return outputs
+
+
+# Moduri de funcționare pentru ResourceGovernor
+GOVERNOR_MODES = ('fixed', 'auto')
+
+# Numărul minim de fișiere per worker: sub el pornirea unui proces (care pe
+# Windows reimportă cv2, pdfplumber și docxtpl) costă mai mult decât câștigul.
+# Mostra auto-tune are tot atâtea fișiere per worker al celei mai mari împărțiri.
+MIN_FILES_PER_WORKER = 3
+
+# Locul implicit unde se păstrează alegerea auto-tune între sesiuni
+AUTOTUNE_CACHE_PATH = Path.home() / '.autoconta' / 'governor.json'
+# După cât timp (secunde) o calibrare salvată expiră și lotul următor e recalibrat
+AUTOTUNE_MAX_AGE = 14 * 24 * 3600
+
+
+class ResourceGovernor:
+    """
+    Împarte bugetul total de nuclee între procesele worker și thread-urile
+    interne ale Tesseract (OpenMP) și OpenCV, ca să nu suprasolicite CPU-ul.
+    """
+
+    def __init__(self, total_cores: Optional[int] = None, mode: str = 'fixed',
+                 max_workers: Optional[int] = None, cache_path: Optional[Union[str, Path]] = None):
+        if mode not in GOVERNOR_MODES:
+            raise ValueError(f"Mod necunoscut: {mode} (disponibile: {', '.join(GOVERNOR_MODES)})")
+        self.total_cores = max(1, total_cores or os.cpu_count() or 1)
+        self.mode = mode
+        self.max_workers = max_workers
+        # Fișierul în care se păstrează alegerea auto-tune; None = doar în memorie
+        self.cache_path = Path(cache_path) if cache_path else None
+        # Numărul de workeri ales de auto-tune (None până la prima calibrare)
+        self.tuned_workers: Optional[int] = self._load_tuning() if mode == 'auto' else None
+
+    def _cache_key(self) -> str:
+        return f"{self.total_cores}:{self.max_workers or 0}"
+
+    def _read_cache(self) -> dict:
+        try:
+            with open(self.cache_path, encoding='utf-8') as f:
+                cache = json.load(f)
+            return cache if isinstance(cache, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _load_tuning(self) -> Optional[int]:
+        """Încarcă alegerea salvată pentru aceeași configurație de nuclee, dacă nu a expirat."""
+        if not self.cache_path:
+            return None
+        entry = self._read_cache().get(self._cache_key())
+        if not isinstance(entry, dict):
+            return None
+        workers, saved = entry.get('workeri'), entry.get('salvat')
+        if not isinstance(workers, int) or workers < 1 or not isinstance(saved, (int, float)):
+            return None
+        if time.time() - saved > AUTOTUNE_MAX_AGE:
+            logger.info(f"Calibrarea salvată în {self.cache_path} a expirat, recalibrez")
+            return None
+        return workers
+
+    def save_tuning(self, workers: int):
+        """Reține alegerea auto-tune și, dacă există cache_path, o salvează pentru sesiunile următoare."""
+        self.tuned_workers = workers
+        if not self.cache_path:
+            return
+        cache = self._read_cache()
+        cache[self._cache_key()] = {'workeri': workers, 'salvat': time.time()}
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.cache_path, 'w', encoding='utf-8') as f:
+                json.dump(cache, f)
+        except OSError as e:
+            logger.warning(f"Nu pot salva calibrarea în {self.cache_path}: {e}")
+
+    def reset_tuning(self):
+        """Uită alegerea curentă, ca următorul lot suficient de mare să fie recalibrat."""
+        self.tuned_workers = None
+        if self.cache_path:
+            cache = self._read_cache()
+            if cache.pop(self._cache_key(), None) is not None:
+                try:
+                    with open(self.cache_path, 'w', encoding='utf-8') as f:
+                        json.dump(cache, f)
+                except OSError as e:
+                    logger.warning(f"Nu pot actualiza {self.cache_path}: {e}")
+
+    def plan(self, n_tasks: int) -> Tuple[int, int]:
+        """Întoarce (workeri, thread-uri per worker) pentru n_tasks documente."""
+        workers = self.tuned_workers or self.max_workers or self.total_cores
+        workers = max(1, min(workers, n_tasks // MIN_FILES_PER_WORKER, self.total_cores))
+        return workers, self.threads_for(workers)
+
+    def threads_for(self, workers: int) -> int:
+        """Thread-urile OCR/OpenCV alocate fiecărui worker din bugetul total."""
+        return max(1, self.total_cores // workers)
+
+    def candidate_workers(self, n_tasks: int) -> List[int]:
+        """Împărțirile încercate la auto-tune: puteri ale lui 2 plus maximul posibil."""
+        limit = max(1, min(n_tasks // MIN_FILES_PER_WORKER, self.total_cores,
+                           self.max_workers or self.total_cores))
+        candidates = []
+        workers = 1
+        while workers < limit:
+            candidates.append(workers)
+            workers *= 2
+        candidates.append(limit)
+        return candidates
+
+    @staticmethod
+    def apply_thread_limits(threads: int):
+        """Aplică limitele de thread-uri în procesul curent (folosit în procesele worker)."""
+        # Tesseract e pornit ca subproces de pytesseract și moștenește mediul
+        os.environ['OMP_THREAD_LIMIT'] = str(threads)
+        cv2.setNumThreads(threads)
+
+    @staticmethod
+    @contextmanager
+    def thread_limits(threads: int):
+        """Aplică limitele temporar în procesul curent și apoi restaurează valorile anterioare."""
+        previous_omp = os.environ.get('OMP_THREAD_LIMIT')
+        previous_cv = cv2.getNumThreads()
+        ResourceGovernor.apply_thread_limits(threads)
+        try:
+            yield
+        finally:
+            if previous_omp is None:
+                os.environ.pop('OMP_THREAD_LIMIT', None)
+            else:
+                os.environ['OMP_THREAD_LIMIT'] = previous_omp
+            cv2.setNumThreads(previous_cv)
+
+
+class OcrWord(NamedTuple):
+    """Un cuvânt OCR: poziția lui în textul documentului, încrederea și bounding box-ul."""
+    start: int
+    end: int
+    conf: float
+    page: Optional[int]  # indexul paginii pentru PDF-uri, None pentru imagini
+    left: int
+    top: int
+    width: int
+    height: int
+
+
+def _shift_words(words: List[OcrWord], offset: int) -> List[OcrWord]:
+    """Mută pozițiile cuvintelor unei pagini în textul întregului document."""
+    return [w._replace(start=w.start + offset, end=w.end + offset) for w in words]
+
+
+def _span_stats(words: List[OcrWord], value_spans: List[Tuple[int, int]], start: int,
+                end: int) -> Tuple[float, Optional[Tuple[int, ...]]]:
+    """
+    Întoarce (încrederea medie 0..1, regiunea) pentru o potrivire. Încrederea e
+    media doar pe cuvintele valorii capturate (value_spans), ca eticheta din fața
+    ei ("Asociat unic:") să nu ascundă o valoare citită prost. Regiunea este
+    (pagina, stânga, sus, dreapta, jos), pe pagina valorii, și cuprinde toată
+    potrivirea start..end de pe acea pagină (eticheta e cerută de pattern) plus
+    următoarele REOCR_CONTEXT_WORDS cuvinte: lookahead-urile pattern-urilor
+    (ex. ", cetățean" după nume) nu fac parte din potrivire, dar trebuie să fie în crop.
+    """
+    value_words = [w for w in words if any(w.start < e and w.end > s for s, e in value_spans)]
+    if not value_words:
+        return 0.0, None
+    page = value_words[0].page
+    confs = [w.conf for w in value_words if w.page == page and w.conf >= 0]
+    conf = sum(confs) / len(confs) / 100 if confs else 0.0
+
+    indexes = [i for i, w in enumerate(words) if w.start < end and w.end > start and w.page == page]
+    following = words[indexes[-1] + 1:indexes[-1] + 1 + REOCR_CONTEXT_WORDS]
+    boxes = [words[i] for i in indexes] + [w for w in following if w.page == page]
+    region = (page,
+              min(w.left for w in boxes), min(w.top for w in boxes),
+              max(w.left + w.width for w in boxes), max(w.top + w.height for w in boxes))
+    return conf, region
+
+
+class DocumentContent:
+    """Conținutul citit dintr-un fișier, cu metadatele folosite la îmbinare."""
+
+    def __init__(self, path: str, text: str, kind: str, table_fields: Optional[Dict[str, str]] = None,
+                 words: Optional[List[OcrWord]] = None):
+        self.path = path
+        self.text = text
+        # Tipul sursei: docx, pdf, pdf_ocr, imagine_ocr (vezi SOURCE_WEIGHTS)
+        self.kind = kind
+        self.table_fields = table_fields or {}
+        self.words = words or []
+
+
+class FieldCandidate:
+    """O valoare găsită pentru un câmp într-un document."""
+
+    def __init__(self, value: str, path: str, source: str, ocr_confidence: float = 1.0,
+                 region: Optional[Tuple[int, ...]] = None):
+        self.value = value
+        self.path = path
+        self.source = source
+        # Media încrederii Tesseract pe cuvintele valorii (1.0 pentru text nativ)
+        self.ocr_confidence = ocr_confidence
+        # Regiunea din pagină pentru re-OCR, doar la sursele OCR
+        self.region = region
+
+    @property
+    def score(self) -> float:
+        return SOURCE_WEIGHTS.get(self.source, 0.5) * self.ocr_confidence
+
+    def __repr__(self):
+        return f"FieldCandidate({self.value!r}, {Path(self.path).name}, {self.source}, {self.score:.2f})"
+
+
+class MergeResult:
+    """Rezultatul îmbinării: valoarea aleasă, încrederea și conflictele pe fiecare câmp."""
+
+    def __init__(self, context: Dict[str, str], confidence: Dict[str, float],
+                 conflicts: Dict[str, List[str]], candidates: Dict[str, List[FieldCandidate]]):
+        self.context = context
+        # Încrederea OCR în valoarea aleasă (1.0 dacă vine dintr-un text nativ)
+        self.confidence = confidence
+        # Valorile alternative, diferite de cea aleasă, pentru câmpurile în conflict
+        self.conflicts = conflicts
+        self.candidates = candidates
+
+    def low_confidence_fields(self) -> List[str]:
+        return [f for f, c in self.confidence.items() if c < LOW_CONFIDENCE_THRESHOLD]
+
+
+# Procesorul folosit în procesele worker (setat de _init_worker)
+_worker_processor = None
+
+
+def _init_worker(processor: 'DocumentProcessor', threads: int):
+    """Inițializează un proces worker cu limitele de thread-uri primite de la governor."""
+    global _worker_processor
+    ResourceGovernor.apply_thread_limits(threads)
+    # Pe Windows workerii pornesc de la zero, deci calea Tesseract trebuie refăcută
+    processor._configure_tesseract()
+    _worker_processor = processor
+
+
+def _read_document_in_worker(path: str) -> DocumentContent:
+    return _worker_processor.read_document(path)
+
+
 class DocumentProcessor:
     """Clasă pentru procesarea diferitelor tipuri de documente."""
 
-    def __init__(self):
+    def __init__(self, pdf_backend: str = 'pdfium', governor: Optional[ResourceGovernor] = None):
+        if pdf_backend not in PDF_BACKENDS:
+            raise ValueError(f"Backend PDF necunoscut: {pdf_backend} (disponibile: {', '.join(PDF_BACKENDS)})")
+        # 'pdfium' extrage textul și randează paginile în proces;
+        # 'pdfplumber' păstrează analiza de layout și pdf2image/poppler pentru OCR
+        self.pdf_backend = pdf_backend
+        # Governor-ul deține bugetul de nuclee pentru citirea în paralel
+        self.governor = governor or ResourceGovernor()
+
         # Configurare Tesseract pentru OCR
         self._configure_tesseract()
         # Tipuri de fișiere suportate
@@ -31,6 +395,10 @@ class DocumentProcessor:
 
         # Regex-uri îmbunătățite pentru extragerea datelor
         self.patterns = self._init_patterns()
+        # Etichete din tabele (ex. extrase ONRC) mapate direct pe câmpurile din patterns
+        self.table_labels = self._init_table_labels()
+        # Variabilele Jinja ale template-urilor, după (cale, mtime)
+        self._template_fields_cache: Dict[Tuple[str, float], List[str]] = {}
 
 
     def _configure_tesseract(self):
@@ -52,12 +420,12 @@ class DocumentProcessor:
         """Inițializează pattern-urile regex pentru diferite tipuri de date."""
         return {
             'nume_prenume': [
-                r"(?:Asociat(?:ul)?\s+unic\s*[:\-]?\s*)([A-ZĂÂÎÎȘȚ][A-ZĂÂÎÎȘȚa-zăâîîșț\s\-\']{3,60}?)(?=,\s*(?:cetatean|cetăţean|născut|nascut))",
-                r"(?:Administrator(?:ul)?\s*[:\-]?\s*)([A-ZĂÂÎÎȘȚ][A-ZĂÂÎÎȘȚa-zăâîîșț\s\-\']{3,60}?)(?=,\s*(?:cetatean|cetăţean|născut|nascut))",
-                r"(?:Beneficiarul\s+real\s+.*?este\s*[:\-]?\s*)([A-ZĂÂÎÎȘȚ][A-ZĂÂÎÎȘȚa-zăâîîșț\s\-\']{3,60}?)(?=,\s*(?:cetatean|cetăţean|născut|nascut))",
-                r"(?:Administrarea\s+societății\s+se\s+face\s+de\s+către\s*[:\-]?\s*)([A-ZĂÂÎÎȘȚ][A-ZĂÂÎÎȘȚa-zăâîîșț\s\-\']{3,60}?)(?=,\s*(?:cetatean|cetăţean|născut|nascut))",
-                r"(?:Controlul\s+.*?exercită.*?calitate\s+de\s+asociat\s+unic,?\s*)([A-ZĂÂÎÎȘȚ][A-ZĂÂÎÎȘȚa-zăâîîșț\s\-\']{3,60}?)(?=,\s*(?:cetatean|cetăţean|născut|nascut))",
-                r"([A-ZĂÂÎÎȘȚ][A-ZĂÂÎÎȘȚa-zăâîîșț]{2,20}(?:\s+[A-ZĂÂÎÎȘȚ][A-ZĂÂÎÎȘȚa-zăâîîșț\-]{2,20}){1,3})(?=,\s*(?:cetatean|cetăţean|născut|nascut))",
+                r"(?:Asociat(?:ul)?\s+unic\s*[:\-]?\s*)([A-ZĂÂÎÎȘȚ][A-ZĂÂÎÎȘȚa-zăâîîșț\s\-\']{3,60}?)(?=,\s*(?:cetatean|cetățean|născut|nascut))",
+                r"(?:Administrator(?:ul)?\s*[:\-]?\s*)([A-ZĂÂÎÎȘȚ][A-ZĂÂÎÎȘȚa-zăâîîșț\s\-\']{3,60}?)(?=,\s*(?:cetatean|cetățean|născut|nascut))",
+                r"(?:Beneficiarul\s+real\s+.*?este\s*[:\-]?\s*)([A-ZĂÂÎÎȘȚ][A-ZĂÂÎÎȘȚa-zăâîîșț\s\-\']{3,60}?)(?=,\s*(?:cetatean|cetățean|născut|nascut))",
+                r"(?:Administrarea\s+societății\s+se\s+face\s+de\s+către\s*[:\-]?\s*)([A-ZĂÂÎÎȘȚ][A-ZĂÂÎÎȘȚa-zăâîîșț\s\-\']{3,60}?)(?=,\s*(?:cetatean|cetățean|născut|nascut))",
+                r"(?:Controlul\s+.*?exercită.*?calitate\s+de\s+asociat\s+unic,?\s*)([A-ZĂÂÎÎȘȚ][A-ZĂÂÎÎȘȚa-zăâîîșț\s\-\']{3,60}?)(?=,\s*(?:cetatean|cetățean|născut|nascut))",
+                r"([A-ZĂÂÎÎȘȚ][A-ZĂÂÎÎȘȚa-zăâîîșț]{2,20}(?:\s+[A-ZĂÂÎÎȘȚ][A-ZĂÂÎÎȘȚa-zăâîîșț\-]{2,20}){1,3})(?=,\s*(?:cetatean|cetățean|născut|nascut))",
                 r"(?:n[ăa]scut[ăa]?\s+(?:la\s+data\s+de\s+|la\s+))(\d{1,2}\s+(?:ianuarie|februarie|martie|aprilie|mai|iunie|iulie|august|septembrie|octombrie|noiembrie|decembrie)\s+\d{4})",
                 r"(?:Birth\s+date[:\s]*)(\d{1,2}\s+[A-Za-z]+\s+\d{4})"
             ],
@@ -131,24 +499,129 @@ class DocumentProcessor:
                 r"(?:Sediul\s+societății\s+este\s+în\s+)(.+?)(?=\n|\.)"
             ]
         }
+    def _init_table_labels(self) -> Dict[str, str]:
+        """
+        Inițializează etichetele recunoscute în celulele de tabel, normalizate
+        (fără diacritice și punctuație), mapate pe câmpurile din patterns.
+        """
+        labels = {
+            'nume_prenume': ["nume si prenume", "nume prenume", "numele si prenumele"],
+            'data_nasterii': ["data nasterii", "data de nastere", "birth date"],
+            'domiciliu': ["domiciliu", "domiciliul", "adresa domiciliu", "residence"],
+            'tip_act_identificare': ["act de identitate", "act identitate", "document de identitate"],
+            'CNP': ["cnp", "cod numeric personal", "personal code"],
+            'nume_societate': ["denumire", "denumirea", "denumire firma", "denumirea societatii",
+                               "firma", "company name"],
+            'sediu_firma': ["sediu social", "sediul social", "adresa sediului social", "sediu",
+                            "headquarters"],
+            'CUI': ["cod unic de inregistrare", "cui", "cod fiscal", "cif", "vat number"],
+            'data_inregistrarii': ["data inregistrarii", "data inmatricularii", "registration date"],
+            'id_unic_european': ["euid", "identificator unic la nivel european"],
+            'numar_ordine': ["nr ordine", "nr de ordine", "numar de ordine", "numar ordine",
+                             "nr ordine in registrul comertului", "nr de ordine in registrul comertului",
+                             "numar de ordine in registrul comertului", "trade register number"],
+        }
+        return {label: field for field, field_labels in labels.items() for label in field_labels}
+
+    @staticmethod
+    def _normalize_label(text: str) -> str:
+        """Normalizează o etichetă: litere mici, fără diacritice, fără punctuație."""
+        text = unicodedata.normalize('NFKD', text)
+        text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+        text = re.sub(r"[^\w\s]", " ", text)
+        return re.sub(r"\s+", " ", text).strip()
+
+    def _match_table_label(self, cell: str) -> Optional[str]:
+        """
+        Întoarce câmpul corespunzător unei celule-etichetă sau None. Eticheta
+        trebuie să fie întreagă; e permis doar un calificativ final, ca "(EUID)"
+        sau ":", pentru ca rânduri ca "Denumire activitate CAEN" sau
+        "Sediu secundar" să nu fie luate drept "Denumire" / "Sediu".
+        """
+        label = re.sub(r"\s*:?\s*(?:\([^()]*\))?\s*:?\s*$", "", cell.strip())
+        return self.table_labels.get(self._normalize_label(label))
+
+    def _normalize_table_value(self, field: str, value: str) -> str:
+        """Curăță valoarea unei celule; întoarce "" dacă nu are formatul câmpului."""
+        if field == 'CUI':
+            digits = re.sub(r"\s+", "", value).upper().replace("RO", "")
+            return digits if re.fullmatch(r"\d{2,10}", digits) else ""
+        if field == 'CNP':
+            digits = re.sub(r"\s+", "", value)
+            return digits if re.fullmatch(r"\d{13}", digits) else ""
+        return self._clean_extracted_text(value)
+
+    def extract_table_fields(self, rows: List[List[Optional[str]]]) -> Dict[str, str]:
+        """
+        Extrage câmpurile din perechi etichetă/valoare aflate pe același rând de tabel.
+        Prima valoare găsită pentru un câmp este păstrată.
+        """
+        data = {}
+        for row in rows:
+            cells = [c.strip() for c in row if c and c.strip()]
+            for i, cell in enumerate(cells[:-1]):
+                field = self._match_table_label(cell)
+                if not field or field in data:
+                    continue
+                value_cell = cells[i + 1]
+                # O celulă-valoare care e tot etichetă înseamnă rând de antet
+                if self._match_table_label(value_cell):
+                    continue
+                value = self._normalize_table_value(field, value_cell)
+                if value:
+                    data[field] = value
+        return data
+
+    def _has_table_labels(self, text: str) -> bool:
+        """
+        Verifică dacă o linie începe cu o etichetă de tabel urmată de o valoare
+        scurtă (sau de nimic), cum apare textul unui rând etichetă-valoare.
+        """
+        for line in text.splitlines():
+            normalized = self._normalize_label(line)
+            for label in self.table_labels:
+                if normalized == label or (normalized.startswith(label + " ")
+                                           and len(normalized) - len(label) <= TABLE_VALUE_MAX_LENGTH):
+                    return True
+        return False
+
+    def _is_table_page(self, page_text: str, rulings: int) -> bool:
+        """
+        Semnalul ieftin că o pagină are tabele, verificat înainte de extract_tables
+        (analiza de layout lentă a pdfplumber): linii de tabel desenate și rânduri
+        etichetă-valoare. Doar etichetele nu ajung, fiindcă apar și în textul curent
+        al extraselor ("Sediu social: ...").
+        """
+        return rulings >= TABLE_MIN_RULINGS and self._has_table_labels(page_text)
+
     def safe_search(self, patterns: List[str], text: str) -> str:
         """
         Caută prin mai multe pattern-uri regex și returnează prima potrivire găsită.
         """
+        found = self._search(patterns, text)
+        return found[0] if found else ""
+
+    def _search(self, patterns: List[str], text: str) -> Optional[Tuple[str, int, int, List[Tuple[int, int]]]]:
+        """
+        Ca safe_search, dar întoarce și pozițiile: (valoare, start, end, spans), unde
+        start..end e întreaga potrivire, iar spans sunt grupurile din care e formată valoarea.
+        """
         for pattern in patterns:
             match = re.search(pattern, text, re.IGNORECASE | re.MULTILINE | re.DOTALL)
             if match:
                 # Încearcă să returneze primul grup de captură, altfel întoarce întreaga potrivire
                 try:
                     result = match.group(1).strip() if match.groups() else match.group(0).strip()
+                    spans = [match.span(1) if match.groups() else match.span(0)]
                     # Pentru CUI, concatenează RO cu cifra dacă există ambele grupuri
                     if len(match.groups()) > 1 and match.group(1) and match.group(2):
                         result = f"{match.group(1)}{match.group(2)}"
+                        spans.append(match.span(2))
                     if result:
-                        return self._clean_extracted_text(result)
+                        return self._clean_extracted_text(result), match.start(), match.end(), spans
                 except (IndexError, AttributeError):
                     continue
-        return ""
+        return None
 
     def _clean_extracted_text(self, text: str) -> str:
         """Curăță textul extras de caractere nedorite."""
@@ -164,6 +637,10 @@ class DocumentProcessor:
         # Conversie la grayscale
         gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
 
+        return self._preprocess_gray(gray)
+
+    def _preprocess_gray(self, gray: np.ndarray) -> np.ndarray:
+        """Aplică filtrarea, contrastul și binarizarea pe o imagine grayscale."""
         # Aplicare filtru pentru reducerea noise-ului
         denoised = cv2.medianBlur(gray, 5)
 
@@ -178,14 +655,99 @@ class DocumentProcessor:
         return binary
 
     def read_pdf(self, path: str) -> str:
-        """Citește textul din PDF (nativ sau scanat prin OCR)."""
+        """Citește textul din PDF (nativ sau scanat prin OCR) cu backend-ul configurat."""
+        return self._read_pdf(path)[0]
+
+    def _read_pdf(self, path: str) -> Tuple[str, List[OcrWord], List[List[Optional[str]]]]:
+        """
+        Ca read_pdf, dar întoarce și cuvintele OCR (goale pentru PDF-uri native)
+        și rândurile tabelelor de pe paginile care par să aibă tabele.
+        """
+        if self.pdf_backend == 'pdfium':
+            try:
+                text, words, rows = self._read_pdf_pdfium(path)
+            except Exception as e:
+                logger.warning(f"PDFium a eșuat pentru {path}, revin la pdfplumber: {e}")
+                text, words, rows = self._read_pdf_pdfplumber(path)
+        else:
+            text, words, rows = self._read_pdf_pdfplumber(path)
+        # Înlocuirea e caracter cu caracter, deci pozițiile cuvintelor OCR rămân valabile
+        rows = [[cell.translate(CEDILLA_TO_COMMA) if cell else cell for cell in row] for row in rows]
+        return text.translate(CEDILLA_TO_COMMA), words, rows
+
+    @staticmethod
+    def _count_rulings_pdfium(page) -> int:
+        """Numără path-urile simple (linii, dreptunghiuri) de pe pagină, până la TABLE_MIN_RULINGS."""
+        count = 0
+        for obj in page.get_objects(filter=[pdfium.raw.FPDF_PAGEOBJ_PATH], max_depth=2):
+            # O linie are 2 segmente, un dreptunghi 4-5; logo-urile vectoriale au mult mai multe
+            if pdfium.raw.FPDFPath_CountSegments(obj.raw) <= 5:
+                count += 1
+                if count >= TABLE_MIN_RULINGS:
+                    break
+        return count
+
+    def _read_pdf_pdfium(self, path: str) -> Tuple[str, List[OcrWord], List[List[Optional[str]]]]:
+        """
+        Extrage textul și randează paginile scanate în proces, prin PDFium.
+        pdfplumber e deschis doar pentru paginile cu semnal de tabel.
+        """
+        text = ""
+        words: List[OcrWord] = []
+        table_pages: List[int] = []
+        pdf = pdfium.PdfDocument(path)
+        try:
+            for i, page in enumerate(pdf):
+                textpage = page.get_textpage()
+                try:
+                    page_text = textpage.get_text_range()
+                    # PDFium întoarce CRLF; normalizăm ca la pdfplumber
+                    page_text = page_text.replace("\r\n", "\n").replace("\r", "\n")
+                    if page_text.strip() and self._is_table_page(page_text, self._count_rulings_pdfium(page)):
+                        table_pages.append(i)
+                finally:
+                    textpage.close()
+                    page.close()
+                if page_text:
+                    text += page_text + "\n"
+
+            # Dacă nu s-a extras text -> fallback OCR pe paginile randate
+            if not text.strip():
+                logger.info(f"PDF {path} pare scanat, aplic OCR (PDFium)...")
+                for i, page in enumerate(pdf):
+                    try:
+                        gray = self._render_pdf_page(page, PDF_RENDER_DPI)
+                        page_text, page_words = self._ocr_words(self._preprocess_gray(gray), OCR_CONFIG, page=i)
+                        if page_text.strip():
+                            words.extend(_shift_words(page_words, len(text)))
+                            text += page_text + "\n"
+                    except Exception as ocr_err:
+                        logger.error(f"Eroare OCR la pagina {i + 1} din {path}: {ocr_err}")
+                    finally:
+                        page.close()
+        finally:
+            pdf.close()
+
+        rows = self.read_pdf_tables(path, table_pages) if table_pages else []
+        return text, words, rows
+
+    def _read_pdf_pdfplumber(self, path: str) -> Tuple[str, List[OcrWord], List[List[Optional[str]]]]:
+        """
+        Citește textul cu pdfplumber, cu OCR prin pdf2image/poppler ca fallback.
+        Tabelele paginilor cu semnal de tabel sunt extrase în aceeași deschidere.
+        """
         text = ""
+        words: List[OcrWord] = []
+        rows = []
         try:
             with pdfplumber.open(path) as pdf:
                 for page in pdf.pages:
                     page_text = page.extract_text()
                     if page_text:
                         text += page_text + "\n"
+                        if self._is_table_page(page_text, len(page.lines) + len(page.rects)):
+                            for table in page.extract_tables():
+                                rows.extend(table)
         except Exception as e:
             logger.error(f"Eroare la citirea PDF {path}: {e}")
 
@@ -193,16 +755,16 @@ class DocumentProcessor:
         if not text.strip():
             logger.info(f"PDF {path} pare scanat, aplic OCR...")
             try:
-                images = convert_from_path(path)
+                images = convert_from_path(path, dpi=PDF_RENDER_DPI)
                 for i, img in enumerate(images, start=1):
                     with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as tmp:
                         img.save(tmp.name, "PNG")
                         try:
                             # Preprocesează imaginea înainte de OCR
                             processed = self.preprocess_image(tmp.name)
-                            config = r"--oem 3 --psm 6 -l ron+eng"
-                            page_text = pytesseract.image_to_string(processed, config=config)
+                            page_text, page_words = self._ocr_words(processed, OCR_CONFIG, page=i - 1)
                             if page_text.strip():
+                                words.extend(_shift_words(page_words, len(text)))
                                 text += page_text + "\n"
                         except Exception as ocr_err:
                             logger.error(f"Eroare OCR la pagina {i} din {path}: {ocr_err}")
@@ -211,50 +773,111 @@ class DocumentProcessor:
             except Exception as e:
                 logger.error(f"Eroare la conversia PDF {path} în imagini pentru OCR: {e}")
 
-        return text
+        return text, words, rows
+
+    @staticmethod
+    def _render_pdf_page(page, dpi: float) -> np.ndarray:
+        """Randează o pagină PDF în grayscale, în memorie."""
+        bitmap = page.render(scale=dpi / 72, grayscale=True)
+        try:
+            # Bitmap-ul e deja în format L; copia e necesară fiindcă view-ul
+            # numpy împarte memoria cu bitmap-ul închis mai jos
+            return bitmap.to_numpy().copy()
+        finally:
+            bitmap.close()
+
+    def _ocr_words(self, image: np.ndarray, config: str, page: Optional[int] = None,
+                   line_sep: str = "\n") -> Tuple[str, List[OcrWord]]:
+        """
+        Rulează OCR și întoarce textul împreună cu cuvintele lui (poziție în text,
+        încredere Tesseract, bounding box). Liniile sunt separate prin line_sep.
+        """
+        data = pytesseract.image_to_data(image, config=config, output_type=pytesseract.Output.DICT)
+        parts: List[str] = []
+        words: List[OcrWord] = []
+        pos = 0
+        previous_line = None
+        for i, word in enumerate(data['text']):
+            word = word.strip()
+            if not word:
+                continue
+            line = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+            if previous_line is not None:
+                parts.append(line_sep if line != previous_line else " ")
+                pos += 1
+            previous_line = line
+            words.append(OcrWord(pos, pos + len(word), float(data['conf'][i]), page,
+                                 data['left'][i], data['top'][i], data['width'][i], data['height'][i]))
+            parts.append(word)
+            pos += len(word)
+        return "".join(parts).translate(CEDILLA_TO_COMMA), words
+
+    def read_pdf_tables(self, path: str, pages: Optional[List[int]] = None) -> List[List[Optional[str]]]:
+        """Citește rândurile tabelelor dintr-un PDF nativ cu pdfplumber (doar din pages, dacă e dat)."""
+        rows = []
+        try:
+            with pdfplumber.open(path, pages=[i + 1 for i in pages] if pages is not None else None) as pdf:
+                for page in pdf.pages:
+                    for table in page.extract_tables():
+                        rows.extend(table)
+        except Exception as e:
+            logger.error(f"Eroare la citirea tabelelor din PDF {path}: {e}")
+        return rows
 
     def read_docx(self, path: str) -> str:
         """Citește textul dintr-un DOCX."""
+        return self._read_docx(path)[0]
+
+    def _read_docx(self, path: str) -> Tuple[str, List[List[str]]]:
+        """Citește textul și rândurile tabelelor dintr-un DOCX, într-o singură deschidere."""
         try:
             doc = Document(path)
             text = "\n".join([paragraph.text for paragraph in doc.paragraphs])
 
             # Citește și din tabele
+            rows = []
             for table in doc.tables:
                 for row in table.rows:
+                    cells = []
+                    previous_tc = None
                     for cell in row.cells:
                         text += f" {cell.text}"
+                        # Celulele unite apar repetat în row.cells, cu același element <w:tc>
+                        if cell._tc is not previous_tc:
+                            cells.append(cell.text.translate(CEDILLA_TO_COMMA))
+                        previous_tc = cell._tc
+                    rows.append(cells)
 
-            return text
+            return text.translate(CEDILLA_TO_COMMA), rows
         except Exception as e:
             logger.error(f"Eroare la citirea DOCX {path}: {e}")
-            return ""
+            return "", []
 
     def read_image_ocr(self, path: str) -> str:
         """Citește textul dintr-o imagine folosind OCR, cu preprocesare și fallback."""
+        return self._read_image_ocr(path)[0]
+
+    def _read_image_ocr(self, path: str) -> Tuple[str, List[OcrWord]]:
+        """Ca read_image_ocr, dar întoarce și cuvintele OCR cu încrederea lor."""
         try:
             # Preprocesare imagine pentru OCR mai bun
             processed = self.preprocess_image(path)
 
-            # Config inițial (română + engleză)
-            config = r"--oem 3 --psm 6 -l ron+eng"
-            text = pytesseract.image_to_string(processed, config=config).strip()
+            # Config inițial (română + engleză); liniile sunt unite prin spațiu,
+            # deci textul e deja normalizat (fără spații multiple)
+            text, words = self._ocr_words(processed, OCR_CONFIG, line_sep=" ")
 
             # Dacă nu a returnat nimic, încearcă fallback doar pe engleză
             if not text:
                 logger.debug(f"OCR cu 'ron+eng' nu a returnat rezultate pentru {path}, încerc fallback ENG.")
                 fallback_config = r"--oem 3 --psm 6 -l eng"
-                text = pytesseract.image_to_string(processed, config=fallback_config).strip()
-
-            # Normalizează textul
-            text = re.sub(r"\s+", " ", text)  # elimină spații multiple
-            text = text.strip()
+                text, words = self._ocr_words(processed, fallback_config, line_sep=" ")
 
-            return text
+            return text, words
 
         except Exception as e:
             logger.error(f"Eroare la OCR pentru {path}: {e}")
-            return ""
+            return "", []
 
     def read_file(self, path: str) -> str:
         """Citește conținutul unui fișier în funcție de extensie."""
@@ -271,43 +894,293 @@ class DocumentProcessor:
             logger.warning(f"Extensie nesuportată: {extension}")
             return ""
 
-    def extract_data(self, text: str) -> Dict[str, str]:
+    def read_document(self, path: str) -> DocumentContent:
         """
-        Extrage datele dintr-un text, indiferent de tipul documentului.
-        Rulează toate pattern-urile și returnează doar câmpurile găsite.
+        Citește un fișier împreună cu metadatele necesare îmbinării: câmpurile
+        din tabele (DOCX și PDF-uri native) și cuvintele OCR cu încrederea lor
+        (imagini și PDF-uri scanate).
         """
-        data = {}
+        extension = Path(path).suffix.lower()
+
+        if extension in ['.docx', '.doc']:
+            text, rows = self._read_docx(path)
+            return DocumentContent(path, text, 'docx', self.extract_table_fields(rows))
+
+        if extension == '.pdf':
+            text, words, rows = self._read_pdf(path)
+            if words:
+                return DocumentContent(path, text, 'pdf_ocr', words=words)
+            return DocumentContent(path, text, 'pdf', self.extract_table_fields(rows))
+
+        if extension in ['.png', '.jpg', '.jpeg', '.tiff', '.bmp']:
+            text, words = self._read_image_ocr(path)
+            return DocumentContent(path, text, 'imagine_ocr', words=words)
+
+        logger.warning(f"Extensie nesuportată: {extension}")
+        return DocumentContent(path, "", 'necunoscut')
+
+    def read_documents(self, paths: List[str]) -> List[DocumentContent]:
+        """
+        Citește mai multe fișiere în paralel, în limitele governor-ului.
+        Rezultatele read_document sunt întoarse în ordinea fișierelor primite.
+        """
+        if not paths:
+            return []
+
+        results: Dict[str, DocumentContent] = {}
+        if self.governor.mode == 'auto' and self.governor.tuned_workers is None:
+            results.update(self.autotune(paths))
+
+        remaining = [p for p in paths if p not in results]
+        if remaining:
+            workers, threads = self.governor.plan(len(remaining))
+            results.update(zip(remaining, self._read_documents_split(remaining, workers, threads)))
+
+        return [results[p] for p in paths]
+
+    def _read_documents_split(self, paths: List[str], workers: int,
+                              threads: int) -> List[DocumentContent]:
+        """Citește fișierele cu o împărțire dată între workeri și thread-uri."""
+        return self._timed_split(paths, workers, threads)[0]
+
+    def _timed_split(self, paths: List[str], workers: int,
+                     threads: int) -> Tuple[List[DocumentContent], float]:
+        """
+        Ca _read_documents_split, dar întoarce și durata citirii. Durata include
+        pornirea și oprirea pool-ului de procese: fiecare folder își pornește
+        propriul pool, deci costul acesta face parte din compararea la auto-tune.
+        """
+        logger.info(f"Citesc {len(paths)} fișiere: {workers} workeri x {threads} thread-uri")
+        start = time.perf_counter()
+        if workers == 1:
+            # Procesul curent (ex. GUI) își păstrează setările după citire
+            with self.governor.thread_limits(threads):
+                results = [self.read_document(p) for p in paths]
+            return results, time.perf_counter() - start
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(self, threads)) as executor:
+            results = list(executor.map(_read_document_in_worker, paths))
+        return results, time.perf_counter() - start
+
+    def autotune(self, paths: List[str]) -> Dict[str, DocumentContent]:
+        """
+        Calibrează numărul de workeri: toate împărțirile încercate citesc aceeași
+        mostră, cu fișiere luate uniform din lot, deci timpii sunt comparabili
+        chiar dacă folderul amestecă PDF-uri scanate, imagini și DOCX. Mostra
+        are MIN_FILES_PER_WORKER fișiere per worker al celei mai mari
+        împărțiri; dacă lotul permite mai puțin de două împărțiri, calibrarea e
+        amânată. Întoarce rezultatele primei citiri a mostrei.
+        """
+        candidates = self.governor.candidate_workers(len(paths))
+        if len(candidates) < 2:
+            logger.info(f"Auto-tune amânat: {len(paths)} fișiere sunt prea puține pentru calibrare")
+            return {}
+
+        size = candidates[-1] * MIN_FILES_PER_WORKER
+        step = len(paths) / size
+        sample = [paths[int(i * step)] for i in range(size)]
+
+        results: Dict[str, DocumentContent] = {}
+        best_workers, best_elapsed = 1, float('inf')
+        for workers in candidates:
+            threads = self.governor.threads_for(workers)
+            sample_results, elapsed = self._timed_split(sample, workers, threads)
+            if not results:
+                results = dict(zip(sample, sample_results))
+            logger.info(f"Auto-tune: {workers} workeri x {threads} thread-uri -> "
+                        f"{len(sample) / max(elapsed, 1e-9):.2f} fișiere/s")
+            if elapsed < best_elapsed:
+                best_workers, best_elapsed = workers, elapsed
+
+        self.governor.save_tuning(best_workers)
+        logger.info(f"Auto-tune: aleg {best_workers} workeri x {self.governor.threads_for(best_workers)} thread-uri")
+        return results
+
+    def extract_data(self, text: str, table_fields: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        """
+        Extrage datele dintr-un text, indiferent de tipul documentului (valorile
+        din extract_candidates, fără metadatele de îmbinare). Returnează doar
+        câmpurile găsite.
+        """
+        content = DocumentContent("", text, "", table_fields)
+        return {field: candidate.value for field, candidate in self.extract_candidates(content).items()}
+
+    def extract_candidates(self, content: DocumentContent) -> Dict[str, FieldCandidate]:
+        """
+        Extrage candidații pentru câmpuri dintr-un document citit. Câmpurile din
+        tabele au prioritate; pentru celelalte rulează pattern-urile, iar la
+        sursele OCR încrederea e media încrederii cuvintelor valorii capturate.
+        """
+        data = {field: FieldCandidate(value, content.path, f"{content.kind}_tabel")
+                for field, value in content.table_fields.items()}
         for field, patterns in self.patterns.items():
-            value = self.safe_search(patterns, text)
-            if value:
-                data[field] = value
+            if field in data:
+                continue
+            found = self._search(patterns, content.text)
+            if not found:
+                continue
+            value, start, end, spans = found
+            conf, region = _span_stats(content.words, spans, start, end) if content.words else (1.0, None)
+            data[field] = FieldCandidate(value, content.path, content.kind, conf, region)
         return data
 
-    def process_directory(self, input_dir: str, template_path: str, output_path: str):
-        all_data: Dict[str, List[str]] = {}
+    def collect_candidates(self, input_dir: str) -> Dict[str, List[FieldCandidate]]:
+        """Citește toate fișierele suportate din folder și adună candidații pe câmpuri."""
+        candidates: Dict[str, List[FieldCandidate]] = {}
 
-        for file_path in Path(input_dir).iterdir():
-            if file_path.is_file() and file_path.suffix.lower() in self.supported_extensions:
-                logger.info(f"Procesez fișierul: {file_path}")
-                text = self.read_file(str(file_path))
-                extracted = self.extract_data(text)
+        # Ordine stabilă, independentă de Path.iterdir()
+        files = sorted(str(f) for f in Path(input_dir).iterdir()
+                       if f.is_file() and f.suffix.lower() in self.supported_extensions)
+        for content in self.read_documents(files):
+            logger.info(f"Procesez fișierul: {content.path}")
+            for field, candidate in self.extract_candidates(content).items():
+                candidates.setdefault(field, []).append(candidate)
 
-                for k, v in extracted.items():
-                    all_data.setdefault(k, []).append(v)
+        logger.info(f"Date totale extrase: { {k: len(v) for k, v in candidates.items()} }")
+        return candidates
 
-        logger.info(f"Date totale extrase: { {k: len(v) for k, v in all_data.items()} }")
+    def _consensus_key(self, field: str, value: str) -> str:
+        """Forma normalizată după care valorile din documente diferite sunt considerate egale."""
+        if field in ('CUI', 'CNP'):
+            return re.sub(r"\D", "", value)
+        return self._normalize_label(value)
+
+    def merge_candidates(self, candidates: Dict[str, List[FieldCandidate]]) -> MergeResult:
+        """
+        Alege determinist câte o valoare pe câmp. Candidații cu aceeași valoare
+        normalizată își adună scorurile (sursă x încredere OCR), deci acordul între
+        documente contează; la egalitate decid cel mai bun candidat și apoi valoarea.
+        Ponderile surselor servesc doar la alegere: încrederea raportată pe câmp
+        vine numai din încrederea OCR a candidaților grupului câștigător.
+        """
+        context, confidence, conflicts = {}, {}, {}
+        for field, field_candidates in candidates.items():
+            groups: Dict[str, List[FieldCandidate]] = {}
+            for candidate in field_candidates:
+                groups.setdefault(self._consensus_key(field, candidate.value), []).append(candidate)
+
+            ranked = sorted(groups.items(), key=lambda item: (-sum(c.score for c in item[1]),
+                                                              -max(c.score for c in item[1]),
+                                                              item[0]))
+            best_group = ranked[0][1]
+            best = sorted(best_group, key=lambda c: (-c.score, c.path, c.value))[0]
+
+            # Probabilitatea ca măcar un candidat din grup să fie citit corect
+            all_wrong = 1.0
+            for c in best_group:
+                all_wrong *= 1.0 - min(c.ocr_confidence, 1.0)
+
+            context[field] = best.value
+            confidence[field] = 1.0 - all_wrong
+            if len(ranked) > 1:
+                conflicts[field] = [sorted(group, key=lambda c: (-c.score, c.path, c.value))[0].value
+                                    for _, group in ranked[1:]]
+
+        return MergeResult(context, confidence, conflicts, candidates)
+
+    def reocr_region(self, candidate: FieldCandidate, field: str) -> Optional[FieldCandidate]:
+        """
+        Refă OCR-ul doar pe regiunea din pagină a unui candidat, la rezoluție
+        de REOCR_SCALE ori mai mare, și caută din nou câmpul în textul obținut.
+        """
+        page, left, top, right, bottom = candidate.region
+        try:
+            if page is None:
+                gray = cv2.imread(candidate.path, cv2.IMREAD_GRAYSCALE)
+                scale = 1
+            else:
+                pdf = pdfium.PdfDocument(candidate.path)
+                try:
+                    pdf_page = pdf[page]
+                    try:
+                        gray = self._render_pdf_page(pdf_page, PDF_RENDER_DPI * REOCR_SCALE)
+                    finally:
+                        pdf_page.close()
+                finally:
+                    pdf.close()
+                scale = REOCR_SCALE
 
-        if all_data:
-            # folosim prima valoare găsită pentru fiecare câmp
-            context = {k: v[0] for k, v in all_data.items()}
+            height, width = gray.shape[:2]
+            x0, y0 = max(0, (left - REOCR_PADDING) * scale), max(0, (top - REOCR_PADDING) * scale)
+            x1, y1 = min(width, (right + REOCR_PADDING) * scale), min(height, (bottom + REOCR_PADDING) * scale)
+            crop = gray[int(y0):int(y1), int(x0):int(x1)]
+            if page is None:
+                crop = cv2.resize(crop, None, fx=REOCR_SCALE, fy=REOCR_SCALE, interpolation=cv2.INTER_CUBIC)
 
-            # completează câmpurile obligatorii lipsă
-            required_fields = list(self.patterns.keys())
+            text, words = self._ocr_words(self._preprocess_gray(crop), OCR_CONFIG)
+        except Exception as e:
+            logger.error(f"Eroare la re-OCR pentru '{field}' din {candidate.path}: {e}")
+            return None
+
+        found = self._search(self.patterns[field], text)
+        if not found:
+            return None
+        value, start, end, spans = found
+        conf, _ = _span_stats(words, spans, start, end)
+        return FieldCandidate(value, candidate.path, candidate.source, conf, candidate.region)
+
+    def refine_low_confidence(self, candidates: Dict[str, List[FieldCandidate]],
+                              result: MergeResult) -> MergeResult:
+        """
+        Pentru câmpurile nesigure sau în conflict, refă OCR-ul doar pe regiunile
+        candidaților OCR cu încredere sub LOW_CONFIDENCE_THRESHOLD și reîmbină dacă
+        s-a obținut un candidat mai bun. Câmpurile deja sigure (ex. dintr-un DOCX
+        sau PDF nativ, fără conflict) nu sunt atinse.
+        """
+        targets = set(result.low_confidence_fields()) | set(result.conflicts)
+        changed = False
+        for field, field_candidates in candidates.items():
+            if field not in targets:
+                continue
+            for i, candidate in enumerate(field_candidates):
+                if candidate.region is None or candidate.ocr_confidence >= LOW_CONFIDENCE_THRESHOLD:
+                    continue
+                refined = self.reocr_region(candidate, field)
+                if refined and refined.ocr_confidence > candidate.ocr_confidence:
+                    logger.info(f"Re-OCR '{field}' în {Path(candidate.path).name}: "
+                                f"{candidate.value!r} ({candidate.ocr_confidence:.2f}) -> "
+                                f"{refined.value!r} ({refined.ocr_confidence:.2f})")
+                    candidates[field][i] = refined
+                    changed = True
+        return self.merge_candidates(candidates) if changed else result
+
+    def merge_directory(self, input_dir: str) -> MergeResult:
+        """Extrage candidații din folder, îi îmbină și rafinează câmpurile nesigure."""
+        candidates = self.collect_candidates(input_dir)
+        result = self.refine_low_confidence(candidates, self.merge_candidates(candidates))
+
+        for field, alternatives in result.conflicts.items():
+            logger.warning(f"Conflict pe '{field}': ales {result.context[field]!r} "
+                           f"(încredere {result.confidence[field]:.2f}), alternative: {alternatives}")
+        for field in result.low_confidence_fields():
+            logger.warning(f"Încredere scăzută pe '{field}': {result.context[field]!r} "
+                           f"({result.confidence[field]:.2f}), verifică manual")
+        return result
+
+    def process_directory(self, input_dir: str, template_path: str, output_path: str):
+        self.process_directory_set(input_dir, {output_path: template_path})
+
+    def process_directory_set(self, input_dir: str, outputs: Dict[str, str]) -> List[str]:
+        """
+        Extrage datele o singură dată și generează toate documentele din outputs
+        ({cale_iesire: cale_template}). Întoarce căile documentelor generate.
+        """
+        # Template-urile sunt citite înainte de extragere, ca un template lipsă
+        # sau invalid să oprească procesarea înainte de citirea/OCR-ul folderului
+        required_fields = self.required_fields(outputs.values())
+        result = self.merge_directory(input_dir)
+
+        if result.context:
+            context = dict(result.context)
+
+            # completează doar câmpurile cerute de template-uri care lipsesc
             context = self.prompt_missing_fields(context, required_fields)
 
-            self.generate_procura(template_path, output_path, context)
+            return self.generate_documents(outputs, context)
         else:
             logger.warning("Nu s-au găsit date în niciun fișier.")
+            return []
 
     def prompt_missing_fields(self, data: dict, required_fields: list) -> dict:
         """
@@ -321,15 +1194,49 @@ class DocumentProcessor:
                 data[field] = user_input
         return data
 
-    def generate_procura(self, template_path: str, output_path: str, context: Dict[str, str]):
+    def template_fields(self, template_path: str) -> List[str]:
+        """Câmpurile cerute de un template, derivate din variabilele Jinja ale acestuia."""
+        key = (template_path, os.path.getmtime(template_path))
+        if key not in self._template_fields_cache:
+            doc = DocxTemplate(template_path)
+            self._template_fields_cache[key] = sorted(doc.get_undeclared_template_variables())
+        return self._template_fields_cache[key]
+
+    def required_fields(self, template_paths: Iterable[str]) -> List[str]:
+        """
+        Reuniunea câmpurilor cerute de template-uri, în ordinea din patterns,
+        urmată de variabilele care nu sunt extrase automat.
+        """
+        fields = set()
+        for template_path in set(template_paths):
+            fields.update(self.template_fields(template_path))
+        known = [f for f in self.patterns if f in fields]
+        return known + sorted(fields - set(known))
+
+    def generate_documents(self, outputs: Dict[str, str], context: Dict[str, str]) -> List[str]:
+        """
+        Generează în paralel toate documentele din outputs ({cale_iesire: cale_template})
+        cu același context. Întoarce căile documentelor generate cu succes.
+        """
+        workers = max(1, min(len(outputs), self.governor.total_cores))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # Fiecare randare primește propria copie a contextului
+            futures = {output_path: executor.submit(self.generate_procura, template_path,
+                                                    output_path, dict(context))
+                       for output_path, template_path in outputs.items()}
+        return [output_path for output_path, future in futures.items() if future.result()]
+
+    def generate_procura(self, template_path: str, output_path: str, context: Dict[str, str]) -> bool:
         """Generează procura folosind template-ul și datele extrase."""
         try:
             doc = DocxTemplate(template_path)
             doc.render(context)
             doc.save(output_path)
             logger.info(f"Procura generată cu succes la: {output_path}")
+            return True
         except Exception as e:
             logger.error(f"Eroare la generarea procurii: {e}")
+            return False
 
 
 
@@ -348,4 +1255,5 @@ def main():
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -12,7 +12,7 @@ if errorlevel 1 (
 
 REM Install required Python packages
 echo Installing Python packages...
-pip install pdfplumber python-docx docxtpl pytesseract opencv-python pdf2image Pillow numpy pyinstaller
+pip install pdfplumber pypdfium2 python-docx docxtpl pytesseract opencv-python pdf2image Pillow numpy pyinstaller
 
 REM Check if Tesseract is installed
 tesseract --version >nul 2>&1
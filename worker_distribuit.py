@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+Mod worker distribuit pentru AutoConta.
+
+Oricâte procese, pe una sau mai multe mașini, pot rula pe aceeași rădăcină
+de intrare partajată (ex. un share de rețea). Fiecare subfolder al rădăcinii
+este un client. Workerii își revendică clienții prin fișiere de lease create
+atomic, îi procesează, scriu documentele din setul de template-uri și un
+fișier de rezultat, iar cât lucrează reîmprospătează lease-ul (heartbeat).
+Lease-urile fără heartbeat mai vechi de lease_timeout sunt preluate de alți
+workeri. Nu e nevoie de server central.
+
+Starea cozii stă în <intrare>/.autoconta/:
+    <client>.lease   - clientul e procesat acum (conține workerul proprietar)
+    <client>.done    - rezultat JSON: documentele generate, câmpuri, câmpuri lipsă,
+                       încrederea și conflictele pe câmpuri
+    <client>.failed  - eroare JSON; clientul nu mai e reîncercat automat. Erorile
+                       setului de template-uri opresc workerul fără .failed
+
+Staleness-ul se calculează din mtime-ul lease-ului, deci ceasurile mașinilor
+trebuie să fie sincronizate (NTP), iar lease_timeout ales cu rezervă mare
+față de intervalul de heartbeat.
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from generare_procuri import (PDF_BACKENDS, DocumentProcessor, ResourceGovernor, load_template_set,
+                              template_outputs)
+
+
+logger = logging.getLogger(__name__)
+
+# Folderul de stare al cozii, în rădăcina de intrare
+STATE_DIR_NAME = '.autoconta'
+
+
+def check_template_set(template_set: List[Dict[str, str]], processor: DocumentProcessor):
+    """
+    Verifică că template-urile setului există și pot fi citite. O eroare aici
+    e de configurare, nu a unui client, deci nu trebuie să ajungă în <client>.failed.
+    """
+    for entry in template_set:
+        template = entry['template']
+        if not os.path.isfile(template):
+            raise ValueError(f"Template-ul nu există: {template}")
+        try:
+            processor.template_fields(template)
+        except Exception as e:
+            raise ValueError(f"Template-ul {template} nu poate fi citit: {e}") from e
+
+
+class FolderQueueWorker:
+    """Worker care revendică și procesează folderele clienților dintr-o rădăcină partajată."""
+
+    def __init__(self, input_root: str, output_root: str, template_set: List[Dict[str, str]],
+                 processor: Optional[DocumentProcessor] = None, worker_id: Optional[str] = None,
+                 lease_timeout: float = 120.0, heartbeat_interval: float = 15.0,
+                 poll_interval: float = 10.0):
+        if heartbeat_interval >= lease_timeout:
+            raise ValueError("heartbeat_interval trebuie să fie mai mic decât lease_timeout")
+        self.input_root = Path(input_root)
+        self.output_root = Path(output_root)
+        self.template_set = template_set
+        self.processor = processor or DocumentProcessor()
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.lease_timeout = lease_timeout
+        self.heartbeat_interval = heartbeat_interval
+        self.poll_interval = poll_interval
+
+        self.state_dir = self.input_root / STATE_DIR_NAME
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        self.output_root.mkdir(parents=True, exist_ok=True)
+
+    def _lease_path(self, client: str) -> Path:
+        return self.state_dir / f"{client}.lease"
+
+    def _done_path(self, client: str) -> Path:
+        return self.state_dir / f"{client}.done"
+
+    def _failed_path(self, client: str) -> Path:
+        return self.state_dir / f"{client}.failed"
+
+    def pending_clients(self) -> List[str]:
+        """Clienții care nu au încă rezultat (done/failed), în ordine stabilă."""
+        clients = []
+        for folder in sorted(self.input_root.iterdir()):
+            if not folder.is_dir() or folder.name.startswith('.'):
+                continue
+            if self._done_path(folder.name).exists() or self._failed_path(folder.name).exists():
+                continue
+            clients.append(folder.name)
+        return clients
+
+    def _create_lease(self, client: str) -> bool:
+        """Creează atomic lease-ul; eșuează dacă altcineva l-a creat deja."""
+        try:
+            fd = os.open(self._lease_path(client), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'worker': self.worker_id, 'host': socket.gethostname(),
+                       'pid': os.getpid(), 'revendicat_la': time.time()}, f)
+        return True
+
+    def _is_stale(self, lease_path: Path) -> bool:
+        try:
+            return time.time() - lease_path.stat().st_mtime > self.lease_timeout
+        except FileNotFoundError:
+            return False
+
+    def _reclaim(self, client: str) -> bool:
+        """
+        Preia un lease expirat. Verificarea staleness-ului și redenumirea sunt
+        pași separați: între ei alt worker poate să fi preluat deja lease-ul și
+        l-a recreat. De aceea, după redenumire, mtime-ul fișierului mutat e
+        verificat din nou; dacă lease-ul e proaspăt, e pus la loc și renunțăm.
+        """
+        lease_path = self._lease_path(client)
+        stale_path = lease_path.with_name(f"{lease_path.name}.stale-{self.worker_id}")
+        try:
+            os.rename(lease_path, stale_path)
+        except (FileNotFoundError, PermissionError, FileExistsError):
+            return False
+        try:
+            contents = stale_path.read_text(encoding='utf-8')
+        except OSError:
+            contents = ''
+
+        if not self._is_stale(stale_path):
+            self._restore_lease(client, stale_path, contents)
+            return False
+
+        try:
+            previous = json.loads(contents).get('worker', '?')
+        except ValueError:
+            previous = '?'
+        stale_path.unlink(missing_ok=True)
+        logger.warning(f"Lease expirat pentru {client} (worker {previous}), îl preiau")
+        return self._create_lease(client)
+
+    def _restore_lease(self, client: str, stale_path: Path, contents: str):
+        """Pune la loc un lease proaspăt mutat din greșeală de _reclaim."""
+        try:
+            fd = os.open(self._lease_path(client), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            # Alt worker a creat între timp un lease nou; proprietarul mutat îl va
+            # pierde la următorul heartbeat și nu își va publica rezultatul
+            logger.warning(f"Nu pot restaura lease-ul pentru {client}: a fost recreat între timp")
+        else:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(contents)
+        stale_path.unlink(missing_ok=True)
+
+    def try_claim(self, client: str) -> bool:
+        """Încearcă să revendice clientul; întoarce True dacă lease-ul e al nostru."""
+        claimed = self._create_lease(client)
+        if not claimed and self._is_stale(self._lease_path(client)):
+            claimed = self._reclaim(client)
+        if not claimed:
+            return False
+
+        # Lista de clienți poate fi veche: alt worker poate să fi terminat clientul
+        # (rezultatul e scris înainte de ștergerea lease-ului)
+        if self._done_path(client).exists() or self._failed_path(client).exists():
+            self._lease_path(client).unlink(missing_ok=True)
+            return False
+        return True
+
+    def owns(self, client: str) -> bool:
+        """Verifică dacă lease-ul clientului aparține încă acestui worker."""
+        try:
+            lease = json.loads(self._lease_path(client).read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return False
+        return lease.get('worker') == self.worker_id
+
+    def _heartbeat(self, client: str, stop: threading.Event, lost: threading.Event):
+        """Reîmprospătează mtime-ul lease-ului până la stop; semnalează lost dacă l-am pierdut."""
+        while not stop.wait(self.heartbeat_interval):
+            if not self.owns(client):
+                logger.error(f"Lease-ul pentru {client} a fost preluat de alt worker")
+                lost.set()
+                return
+            try:
+                os.utime(self._lease_path(client))
+            except OSError as e:
+                logger.error(f"Heartbeat eșuat pentru {client}: {e}")
+
+    def _write_json_atomic(self, path: Path, data: dict):
+        tmp_path = path.with_name(f"{path.name}.{self.worker_id}.tmp")
+        tmp_path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding='utf-8')
+        os.replace(tmp_path, path)
+
+    def process_client(self, client: str) -> bool:
+        """Procesează un client revendicat; întoarce True dacă rezultatul a fost publicat."""
+        stop, lost = threading.Event(), threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(client, stop, lost), daemon=True)
+        heartbeat.start()
+
+        tmp_outputs: Dict[str, str] = {}
+        start = time.time()
+        try:
+            outputs = template_outputs(self.template_set, str(self.output_root), client)
+            # Documentele sunt randate sub nume temporare și publicate doar dacă lease-ul e încă al nostru
+            tmp_outputs = {output_path: str(Path(output_path).with_name(
+                               f".{Path(output_path).stem}.{self.worker_id}.tmp.docx"))
+                           for output_path in outputs}
+            result = self.processor.merge_directory(str(self.input_root / client))
+            # Fără utilizator la tastatură: câmpurile lipsă rămân goale, iar cele
+            # lipsă, în conflict sau nesigure sunt raportate în fișierul de rezultat
+            context = result.context
+            missing = [f for f in self.processor.required_fields(outputs.values()) if not context.get(f)]
+
+            if context:
+                generated = self.processor.generate_documents(
+                    {tmp_outputs[p]: template for p, template in outputs.items()}, context)
+                if len(generated) != len(outputs):
+                    raise RuntimeError("generarea documentelor a eșuat")
+
+            if lost.is_set() or not self.owns(client):
+                logger.warning(f"Renunț la rezultatul pentru {client}: lease pierdut")
+                for tmp_output in tmp_outputs.values():
+                    Path(tmp_output).unlink(missing_ok=True)
+                return False
+
+            if context:
+                for output_path, tmp_output in tmp_outputs.items():
+                    os.replace(tmp_output, output_path)
+            self._write_json_atomic(self._done_path(client), {
+                'client': client,
+                'worker': self.worker_id,
+                'documente': list(outputs) if context else [],
+                'campuri': context,
+                'campuri_lipsa': missing,
+                'incredere': {f: round(c, 2) for f, c in result.confidence.items()},
+                'conflicte': result.conflicts,
+                'campuri_nesigure': result.low_confidence_fields(),
+                'durata_s': round(time.time() - start, 2),
+                'finalizat_la': time.time(),
+            })
+            logger.info(f"Client {client} finalizat în {time.time() - start:.1f}s (lipsă: {missing})")
+            return True
+        except Exception as e:
+            logger.error(f"Eroare la procesarea clientului {client}: {e}")
+            for tmp_output in tmp_outputs.values():
+                Path(tmp_output).unlink(missing_ok=True)
+            # Dacă între timp s-a stricat setul de template-uri, oprim workerul fără
+            # să marcăm clientul: lease-ul e eliberat și clientul rămâne în coadă
+            check_template_set(self.template_set, self.processor)
+            if self.owns(client):
+                self._write_json_atomic(self._failed_path(client), {
+                    'client': client, 'worker': self.worker_id, 'eroare': str(e),
+                    'finalizat_la': time.time(),
+                })
+            return False
+        finally:
+            stop.set()
+            heartbeat.join()
+            if self.owns(client):
+                self._lease_path(client).unlink(missing_ok=True)
+
+    def run(self, exit_when_idle: bool = True) -> int:
+        """
+        Revendică și procesează clienți până când coada e goală (sau la nesfârșit
+        dacă exit_when_idle e False). Întoarce numărul de clienți finalizați.
+        """
+        check_template_set(self.template_set, self.processor)
+        logger.info(f"Worker {self.worker_id} pornit pe {self.input_root}")
+        processed = 0
+        while True:
+            pending = self.pending_clients()
+            if not pending and exit_when_idle:
+                break
+
+            claimed_any = False
+            for client in pending:
+                if self.try_claim(client):
+                    claimed_any = True
+                    processed += self.process_client(client)
+
+            # Restul clienților sunt ținuți de alți workeri activi; așteptăm
+            # ca să le putem prelua lease-urile dacă aceștia cad
+            if not claimed_any:
+                time.sleep(self.poll_interval)
+
+        logger.info(f"Worker {self.worker_id} oprit, {processed} clienți finalizați")
+        return processed
+
+
+def _run_worker(options: dict, total_cores: int):
+    """Punctul de intrare al unui proces worker local."""
+    processor = DocumentProcessor(pdf_backend=options.pop('pdf_backend'),
+                                  governor=ResourceGovernor(total_cores=total_cores))
+    exit_when_idle = options.pop('exit_when_idle')
+    FolderQueueWorker(processor=processor, **options).run(exit_when_idle=exit_when_idle)
+
+
+def run_local_workers(n_processes: int, **options):
+    """Pornește n_processes workeri pe mașina curentă, cu nucleele împărțite între ei."""
+    total_cores = max(1, (os.cpu_count() or 1) // n_processes)
+    processes = [multiprocessing.Process(target=_run_worker, args=(dict(options), total_cores))
+                 for _ in range(n_processes)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker AutoConta pe o coadă de foldere partajată")
+    parser.add_argument("--intrare", required=True, help="Rădăcina partajată cu folderele clienților")
+    parser.add_argument("--iesire", required=True, help="Folderul pentru procurile generate")
+    parser.add_argument("--set-template", default=None,
+                        help="Setul de template-uri (JSON); implicit doar procura RO/ENG")
+    parser.add_argument("--procese", type=int, default=1, help="Numărul de workeri pe această mașină")
+    parser.add_argument("--pdf-backend", default="pdfium", choices=PDF_BACKENDS, help="Backend-ul PDF")
+    parser.add_argument("--lease-timeout", type=float, default=120.0, help="Secunde până la expirarea unui lease")
+    parser.add_argument("--heartbeat", type=float, default=15.0, help="Intervalul heartbeat în secunde")
+    parser.add_argument("--poll", type=float, default=10.0, help="Pauza între scanări în secunde")
+    parser.add_argument("--continuu", action="store_true", help="Nu te opri când coada e goală")
+    args = parser.parse_args()
+
+    # Setul de template-uri e verificat o dată, înainte de pornirea workerilor
+    try:
+        template_set = load_template_set(args.set_template)
+        check_template_set(template_set, DocumentProcessor(pdf_backend=args.pdf_backend))
+    except ValueError as e:
+        logger.error(f"Set de template-uri invalid: {e}")
+        return 1
+
+    run_local_workers(
+        max(1, args.procese),
+        input_root=args.intrare,
+        output_root=args.iesire,
+        template_set=template_set,
+        pdf_backend=args.pdf_backend,
+        lease_timeout=args.lease_timeout,
+        heartbeat_interval=args.heartbeat,
+        poll_interval=args.poll,
+        exit_when_idle=not args.continuu,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())